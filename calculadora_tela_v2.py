@@ -1,8 +1,15 @@
 # calculadora_tela_v2.py
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import json
 import math
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_right
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
 
 # openpyxl es opcional (se usa si el usuario quiere guardar en .xlsx)
 try:
@@ -37,37 +44,114 @@ def format_cost(n):
         return int(n)
     return f"{n:.2f}"
 
+def cm_a_dmm(cm):
+    """
+    Convierte una medida en cm a décimas de milímetro enteras (centésimas de cm).
+    Devuelve None si no es un número finito o tiene más de 2 decimales en cm.
+    """
+    try:
+        n = (cm * 100.0).__round__()
+    except (ValueError, OverflowError):
+        return None
+    # n / 100 es el float más cercano a n centésimas: si coincide, cm era exactamente eso
+    return n if n / 100 == cm else None
+
+def pct_a_pb(pct):
+    """
+    Convierte un porcentaje a puntos básicos enteros (1% = 100 pb),
+    redondeando la mitad hacia arriba sobre el valor decimal escrito (0.145% -> 15 pb).
+    """
+    # con hasta 2 decimales la conversión es la misma que de cm a centésimas de cm
+    pb = cm_a_dmm(pct)
+    if pb is not None:
+        return pb
+    return int(Decimal(str(pct)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def _medidas_a_dmm(ancho_tela_cm, ancho_molde_cm, alto_molde_cm, margen_cm, desperdicio_pct, largo_cm=0):
+    """
+    Parte común del modo exacto: valida y convierte las medidas a décimas de mm
+    y el desperdicio a puntos básicos, y suma el margen a cada lado del molde.
+    Devuelve (ancho_tela_u, ancho_total_u, alto_total_u, 10000 + desperdicio_pb, largo_u);
+    lanza ValueError con el mensaje para el usuario si algo no es válido.
+    """
+    # desenrollado a propósito (es el camino caliente del modo exacto); misma regla que cm_a_dmm
+    try:
+        ancho_tela_u = (ancho_tela_cm * 100.0).__round__()
+        ancho_molde_u = (ancho_molde_cm * 100.0).__round__()
+        alto_molde_u = (alto_molde_cm * 100.0).__round__()
+        margen_u = (margen_cm * 100.0).__round__()
+        largo_u = (largo_cm * 100.0).__round__()
+        desperdicio_pb = (desperdicio_pct * 100.0).__round__()
+    except (ValueError, OverflowError):
+        raise ValueError("Las medidas y el desperdicio deben ser números finitos.") from None
+    if (ancho_tela_u / 100 != ancho_tela_cm or ancho_molde_u / 100 != ancho_molde_cm
+            or alto_molde_u / 100 != alto_molde_cm or margen_u / 100 != margen_cm
+            or largo_u / 100 != largo_cm):
+        raise ValueError("Las medidas deben tener como máximo 2 decimales en cm (0,1 mm).")
+    margen_u *= 2
+    ancho_total_u = ancho_molde_u + margen_u
+    alto_total_u = alto_molde_u + margen_u
+    if ancho_total_u <= 0 or alto_total_u <= 0:
+        raise ValueError("Dimensiones o margen inválidos.")
+    if ancho_total_u > ancho_tela_u:
+        raise ValueError("El ancho total del molde (incluido margen) supera el ancho utilizable de la tela.")
+    if desperdicio_pb / 100 != desperdicio_pct:
+        # más de 2 decimales: se redondea sobre el valor decimal escrito
+        desperdicio_pb = pct_a_pb(desperdicio_pct)
+    return ancho_tela_u, ancho_total_u, alto_total_u, 10000 + desperdicio_pb, largo_u
+
 
 # ------------------------
 # LÓGICA DE CÁLCULOS
 # ------------------------
 def calcular_tela_por_cantidad(ancho_tela_cm, ancho_molde_cm, alto_molde_cm,
-                               margen_costura_cm, desperdicio_pct, cantidad, doble_molde=False):
+                               margen_costura_cm, desperdicio_pct, cantidad, doble_molde=False,
+                               exacto=False):
     """
     Calcula la tela necesaria (largo en cm) para producir 'cantidad' piezas.
     Si doble_molde=True entonces la cantidad se multiplica por 2 (frente+contrafrente).
     Aplica margen por lado (se suma 2*margen al ancho y al alto).
     Aplica desperdicio (%) sobre el largo total final.
+    Si exacto=True las medidas se llevan a décimas de milímetro enteras y el
+    desperdicio a puntos básicos, y todo se calcula con enteros (sin errores de
+    punto flotante); las medidas con más de 2 decimales en cm dan error.
     Devuelve dict con resultados o (None, error_msg).
     """
     if doble_molde:
         cantidad = cantidad * 2
 
-    ancho_total = ancho_molde_cm + 2 * margen_costura_cm
-    alto_total = alto_molde_cm + 2 * margen_costura_cm
-
-    if ancho_total <= 0 or alto_total <= 0:
-        return None, "Dimensiones o margen inválidos."
-    if ancho_total > ancho_tela_cm:
-        return None, "El ancho total del molde (incluido margen) supera el ancho utilizable de la tela."
-
-    moldes_por_fila = int(math.floor(ancho_tela_cm / ancho_total))
-    if moldes_por_fila <= 0:
-        return None, "No entra ningún molde por fila."
-
-    filas_necesarias = int(math.ceil(cantidad / moldes_por_fila))
-    largo_total_sin_desperdicio = filas_necesarias * alto_total
-    largo_total_con_desperdicio = largo_total_sin_desperdicio * (1 + desperdicio_pct / 100.0)
+    if exacto:
+        try:
+            ancho_tela_u, ancho_total_u, alto_total_u, factor_pb, _ = _medidas_a_dmm(
+                ancho_tela_cm, ancho_molde_cm, alto_molde_cm, margen_costura_cm, desperdicio_pct)
+        except ValueError as e:
+            return None, str(e)
+        # ancho_total_u <= ancho_tela_u: entra al menos un molde por fila
+        moldes_por_fila = ancho_tela_u // ancho_total_u
+        filas_necesarias = -(-cantidad // moldes_por_fila)
+        largo_sin_u = filas_necesarias * alto_total_u
+        ancho_total = ancho_total_u / 100
+        alto_total = alto_total_u / 100
+        largo_total_sin_desperdicio = largo_sin_u / 100
+        # centésimas de cm * (10000 + pb) / 10000, redondeando la mitad hacia arriba
+        largo_total_con_desperdicio = ((largo_sin_u * factor_pb + 5000) // 10000) / 100
+    else:
+        ancho_total = ancho_molde_cm + 2 * margen_costura_cm
+        alto_total = alto_molde_cm + 2 * margen_costura_cm
+
+        if ancho_total <= 0 or alto_total <= 0:
+            return None, "Dimensiones o margen inválidos."
+        if ancho_total > ancho_tela_cm:
+            return None, "El ancho total del molde (incluido margen) supera el ancho utilizable de la tela."
+
+        moldes_por_fila = int(math.floor(ancho_tela_cm / ancho_total))
+        if moldes_por_fila <= 0:
+            return None, "No entra ningún molde por fila."
+
+        filas_necesarias = int(math.ceil(cantidad / moldes_por_fila))
+        largo_total_sin_desperdicio = filas_necesarias * alto_total
+        largo_total_con_desperdicio = round(largo_total_sin_desperdicio * (1 + desperdicio_pct / 100.0), 2)
+        largo_total_sin_desperdicio = round(largo_total_sin_desperdicio, 2)
 
     res = {
         "modo": "Calcular tela según cantidad de objetos/piezas",
@@ -81,37 +165,59 @@ def calcular_tela_por_cantidad(ancho_tela_cm, ancho_molde_cm, alto_molde_cm,
         "filas_necesarias": filas_necesarias,
         "cantidad_solicitada": cantidad,
         "doble_molde": doble_molde,
-        "largo_total_sin_desperdicio_cm": round(largo_total_sin_desperdicio, 2),
-        "largo_total_con_desperdicio_cm": round(largo_total_con_desperdicio, 2)
+        "largo_total_sin_desperdicio_cm": largo_total_sin_desperdicio,
+        "largo_total_con_desperdicio_cm": largo_total_con_desperdicio
     }
     return res, None
 
 
 def calcular_moldes_con_tela(ancho_tela_cm, ancho_molde_cm, alto_molde_cm,
-                             margen_costura_cm, desperdicio_pct, largo_tela_disponible_cm):
+                             margen_costura_cm, desperdicio_pct, largo_tela_disponible_cm,
+                             exacto=False):
     """
     Calcula cuántos moldes se obtienen con un largo de tela disponible (en cm).
     El desperdicio (%) reduce la longitud utilizable: se considera que el largo real utilizable
     es largo_tela_disponible_cm / (1 + desperdicio_pct/100).
+    Si exacto=True se calcula con décimas de milímetro y puntos básicos enteros
+    (ver calcular_tela_por_cantidad).
     """
-    ancho_total = ancho_molde_cm + 2 * margen_costura_cm
-    alto_total = alto_molde_cm + 2 * margen_costura_cm
-
-    if ancho_total <= 0 or alto_total <= 0:
-        return None, "Dimensiones o margen inválidos."
-    if ancho_total > ancho_tela_cm:
-        return None, "El ancho total del molde (incluido margen) supera el ancho utilizable de la tela."
-
-    moldes_por_fila = int(math.floor(ancho_tela_cm / ancho_total))
-    if moldes_por_fila <= 0:
-        return None, "No entra ningún molde por fila."
-
-    # descontar desperdicio: largo utilizable real
-    if (1 + desperdicio_pct / 100.0) <= 0:
-        return None, "Porcentaje de desperdicio inválido."
-    largo_utilizable_cm = largo_tela_disponible_cm / (1 + desperdicio_pct / 100.0)
-
-    filas_posibles = int(math.floor(largo_utilizable_cm / alto_total))
+    if exacto:
+        try:
+            ancho_tela_u, ancho_total_u, alto_total_u, factor_pb, disponible_u = _medidas_a_dmm(
+                ancho_tela_cm, ancho_molde_cm, alto_molde_cm, margen_costura_cm, desperdicio_pct,
+                largo_tela_disponible_cm)
+        except ValueError as e:
+            return None, str(e)
+        # ancho_total_u <= ancho_tela_u: entra al menos un molde por fila
+        moldes_por_fila = ancho_tela_u // ancho_total_u
+
+        # descontar desperdicio: largo utilizable real
+        if factor_pb <= 0:
+            return None, "Porcentaje de desperdicio inválido."
+        # centésimas de cm * 10000 / (10000 + pb), redondeando la mitad hacia arriba
+        largo_utilizable_cm = ((disponible_u * 20000 + factor_pb) // (2 * factor_pb)) / 100
+        filas_posibles = (disponible_u * 10000) // (factor_pb * alto_total_u)
+        ancho_total = ancho_total_u / 100
+        alto_total = alto_total_u / 100
+    else:
+        ancho_total = ancho_molde_cm + 2 * margen_costura_cm
+        alto_total = alto_molde_cm + 2 * margen_costura_cm
+
+        if ancho_total <= 0 or alto_total <= 0:
+            return None, "Dimensiones o margen inválidos."
+        if ancho_total > ancho_tela_cm:
+            return None, "El ancho total del molde (incluido margen) supera el ancho utilizable de la tela."
+
+        moldes_por_fila = int(math.floor(ancho_tela_cm / ancho_total))
+        if moldes_por_fila <= 0:
+            return None, "No entra ningún molde por fila."
+
+        # descontar desperdicio: largo utilizable real
+        if (1 + desperdicio_pct / 100.0) <= 0:
+            return None, "Porcentaje de desperdicio inválido."
+        largo_utilizable_cm = largo_tela_disponible_cm / (1 + desperdicio_pct / 100.0)
+        filas_posibles = int(math.floor(largo_utilizable_cm / alto_total))
+        largo_utilizable_cm = round(largo_utilizable_cm, 2)
     total_moldes = moldes_por_fila * filas_posibles
 
     res = {
@@ -126,7 +232,7 @@ def calcular_moldes_con_tela(ancho_tela_cm, ancho_molde_cm, alto_molde_cm,
         "filas_posibles": filas_posibles,
         "total_moldes_obtenibles": total_moldes,
         "largo_tela_disponible_cm": largo_tela_disponible_cm,
-        "largo_utilizable_cm": round(largo_utilizable_cm, 2)
+        "largo_utilizable_cm": largo_utilizable_cm
     }
     return res, None
 
@@ -148,13 +254,238 @@ def calcular_costos_desde_largo(largo_tela_cm, precio_por_metro, cantidad_unidad
 
 
 # ------------------------
-# GUARDADO (TXT / XLSX)
+# COSTOS POR PROVEEDOR (TRAMOS / MÍNIMOS / ANCHOS)
+# ------------------------
+def preparar_tarifa(proveedor):
+    """
+    Normaliza la tabla de precios de un proveedor.
+    'proveedor' es un dict con:
+      - "nombre": nombre del proveedor
+      - "anchos_cm": anchos de tela que ofrece
+      - "tramos": lista de (desde_metros, precio_por_metro); el precio del tramo
+        alcanzado se aplica a todos los metros del pedido
+      - "minimo_metros" (opcional): compra mínima; si se necesita menos se paga el mínimo
+    Devuelve (tarifa, None) o (None, error_msg).
+    """
+    nombre = proveedor.get("nombre", "?")
+    try:
+        tramos = sorted((float(desde), float(precio)) for desde, precio in proveedor.get("tramos", []))
+        anchos = [float(a) for a in proveedor.get("anchos_cm", [])]
+        minimo = float(proveedor.get("minimo_metros", 0) or 0)
+    except (TypeError, ValueError):
+        return None, f"Los tramos, anchos y mínimo del proveedor {nombre} deben ser números."
+    if not tramos:
+        return None, f"El proveedor {nombre} no tiene tramos de precio."
+    if tramos[0][0] > 0:
+        return None, f"El primer tramo del proveedor {nombre} debe empezar en 0 metros."
+    for desde, precio in tramos:
+        if not (math.isfinite(desde) and math.isfinite(precio)):
+            return None, f"Los tramos del proveedor {nombre} deben ser números finitos."
+        if precio <= 0:
+            return None, f"Los precios del proveedor {nombre} deben ser mayores que 0."
+    for anterior, siguiente in zip(tramos, tramos[1:]):
+        if anterior[0] == siguiente[0]:
+            return None, f"El proveedor {nombre} tiene dos tramos que empiezan en {format_number(siguiente[0])} metros."
+    for ancho in anchos:
+        if not (math.isfinite(ancho) and ancho > 0):
+            return None, f"Los anchos del proveedor {nombre} deben ser mayores que 0."
+    if not (math.isfinite(minimo) and minimo >= 0):
+        return None, f"La compra mínima del proveedor {nombre} no puede ser negativa."
+    tarifa = {
+        "nombre": proveedor.get("nombre", ""),
+        "anchos_cm": anchos,
+        "limites_m": [desde for desde, _ in tramos],
+        "precios": [precio for _, precio in tramos],
+        "minimo_metros": minimo
+    }
+    return tarifa, None
+
+
+def costo_con_tarifa(metros, tarifa):
+    """
+    Devuelve (metros_compra, precio_por_metro, costo_total) para 'metros' necesarios,
+    aplicando la compra mínima y el tramo de precio correspondiente.
+    Si comprar hasta el inicio de un tramo superior sale más barato, se compra eso.
+    """
+    limites = tarifa["limites_m"]
+    precios = tarifa["precios"]
+    metros_compra = metros if metros > tarifa["minimo_metros"] else tarifa["minimo_metros"]
+    j = bisect_right(limites, metros_compra) - 1
+    mejor = (metros_compra, precios[j], metros_compra * precios[j])
+    for k in range(j + 1, len(limites)):
+        costo = limites[k] * precios[k]
+        if costo < mejor[2]:
+            mejor = (limites[k], precios[k], costo)
+    return mejor[0], mejor[1], round(mejor[2], 2)
+
+
+def costos_con_tarifa(lista_metros, tarifa):
+    """
+    Versión por lote de costo_con_tarifa: devuelve sólo el costo (sin redondear)
+    de cada elemento de 'lista_metros', o infinito si el elemento es None.
+    """
+    limites = tarifa["limites_m"]
+    precios = tarifa["precios"]
+    minimo = tarifa["minimo_metros"]
+    # salto[j]: costo más bajo comprando justo el inicio de algún tramo >= j
+    salto = [math.inf] * (len(limites) + 1)
+    for k in range(len(limites) - 1, -1, -1):
+        salto[k] = min(salto[k + 1], limites[k] * precios[k])
+    costos = []
+    agregar = costos.append
+    for metros in lista_metros:
+        if metros is None:
+            agregar(math.inf)
+            continue
+        compra = metros if metros > minimo else minimo
+        j = bisect_right(limites, compra)
+        costo = compra * precios[j - 1]
+        agregar(costo if costo <= salto[j] else salto[j])
+    return costos
+
+
+class MotorCostos:
+    """
+    Cotiza lotes de pedidos contra varias tablas de precios de proveedores.
+    Cada pedido es un dict con las claves de calcular_tela_por_cantidad:
+    ancho_molde_cm, alto_molde_cm, margen_costura_cm, desperdicio_pct, cantidad
+    y doble_molde (opcional).
+    Las disposiciones (metros necesarios por pedido) se calculan una sola vez por
+    ancho de tela y quedan en caché: al cambiar los precios sólo se rehace el costo.
+    Los pedidos idénticos se agrupan y se calculan una sola vez.
+    Lanza ValueError si algún pedido tiene cantidad <= 0.
+    Con exacto=True las disposiciones se calculan con aritmética entera
+    (décimas de milímetro y puntos básicos), como en calcular_tela_por_cantidad;
+    un pedido o ancho con más de 2 decimales en cm da ValueError.
+    """
+
+    def __init__(self, pedidos, exacto=False):
+        self.pedidos = list(pedidos)
+        for i, p in enumerate(self.pedidos):
+            if p["cantidad"] <= 0:
+                raise ValueError(f"El pedido {i + 1} debe tener una cantidad mayor que 0.")
+        self.exacto = exacto
+        # pedidos distintos y, para cada pedido, el índice de su pedido distinto
+        self._unicos = []
+        self._indice = []
+        vistos = {}
+        for p in self.pedidos:
+            clave = (p["ancho_molde_cm"], p["alto_molde_cm"], p.get("margen_costura_cm", 0),
+                     p.get("desperdicio_pct", 0), p["cantidad"], bool(p.get("doble_molde", False)))
+            k = vistos.get(clave)
+            if k is None:
+                k = vistos[clave] = len(self._unicos)
+                self._unicos.append(clave)
+            self._indice.append(k)
+        # ancho_tela_cm -> lista de metros necesarios por pedido distinto (None si no entra)
+        self._metros_por_ancho = {}
+        # (ancho_total, alto_total en décimas de mm, 10000 + desperdicio_pb, cantidad) por pedido distinto
+        self._unicos_dmm = None
+
+    def metros_para_ancho(self, ancho_tela_cm):
+        """Metros de tela necesarios (con desperdicio) de cada pedido distinto para ese ancho."""
+        ancho_tela_cm = float(ancho_tela_cm)
+        metros = self._metros_por_ancho.get(ancho_tela_cm)
+        if metros is None and self.exacto:
+            metros = self._metros_para_ancho_exacto(ancho_tela_cm)
+            self._metros_por_ancho[ancho_tela_cm] = metros
+        elif metros is None:
+            metros = []
+            for ancho_molde, alto_molde, margen, desperdicio, cantidad, doble in self._unicos:
+                res, err = calcular_tela_por_cantidad(ancho_tela_cm, ancho_molde, alto_molde,
+                                                      margen, desperdicio, cantidad, doble_molde=doble)
+                metros.append(None if err else round(res["largo_total_con_desperdicio_cm"] / 100.0, 4))
+            self._metros_por_ancho[ancho_tela_cm] = metros
+        return metros
+
+    def _metros_para_ancho_exacto(self, ancho_tela_cm):
+        """Igual que metros_para_ancho pero con enteros (décimas de mm y puntos básicos)."""
+        ancho_tela_u = cm_a_dmm(ancho_tela_cm)
+        if ancho_tela_u is None:
+            raise ValueError(f"El ancho de tela {ancho_tela_cm} tiene más de 2 decimales en cm (0,1 mm).")
+        if self._unicos_dmm is None:
+            unicos_dmm = []
+            for k, (ancho_molde, alto_molde, margen, desperdicio, cantidad, doble) in enumerate(self._unicos):
+                ancho_molde_u = cm_a_dmm(ancho_molde)
+                alto_molde_u = cm_a_dmm(alto_molde)
+                margen_u = cm_a_dmm(margen)
+                if ancho_molde_u is None or alto_molde_u is None or margen_u is None:
+                    raise ValueError(f"El pedido {self._indice.index(k)} tiene medidas con más de "
+                                     "2 decimales en cm (0,1 mm).")
+                unicos_dmm.append((ancho_molde_u + 2 * margen_u,
+                                   alto_molde_u + 2 * margen_u,
+                                   10000 + pct_a_pb(desperdicio),
+                                   cantidad * 2 if doble else cantidad))
+            self._unicos_dmm = unicos_dmm
+        metros = []
+        agregar = metros.append
+        for ancho_total_u, alto_total_u, factor_pb, cantidad in self._unicos_dmm:
+            if ancho_total_u <= 0 or alto_total_u <= 0 or ancho_total_u > ancho_tela_u:
+                agregar(None)
+                continue
+            filas = -(-cantidad // (ancho_tela_u // ancho_total_u))
+            # centésimas de cm * (10000 + pb) / 10000 (mitad hacia arriba), luego a metros
+            agregar(((filas * alto_total_u * factor_pb + 5000) // 10000) / 10000)
+        return metros
+
+    def invalidar(self, ancho_tela_cm=None):
+        """Descarta la caché de disposiciones (de un ancho o completa)."""
+        if ancho_tela_cm is None:
+            self._metros_por_ancho.clear()
+        else:
+            self._metros_por_ancho.pop(float(ancho_tela_cm), None)
+
+    def cotizar(self, proveedores):
+        """
+        Devuelve una lista (en el orden de los pedidos) con la combinación
+        proveedor/ancho/tramo más barata de cada pedido, o None si ningún
+        proveedor tiene un ancho donde entre el molde.
+        Cada pedido recibe su propio dict, aunque sea idéntico a otro.
+        """
+        tarifas = []
+        for proveedor in proveedores:
+            tarifa, err = preparar_tarifa(proveedor)
+            if err:
+                raise ValueError(err)
+            tarifas.append(tarifa)
+
+        combinaciones = [(tarifa, ancho) for tarifa in tarifas for ancho in tarifa["anchos_cm"]]
+        if not combinaciones:
+            return [None] * len(self.pedidos)
+        columnas = [costos_con_tarifa(self.metros_para_ancho(ancho), tarifa)
+                    for tarifa, ancho in combinaciones]
+        mejor = []
+        for fila in zip(*columnas):
+            minimo = min(fila)
+            mejor.append(fila.index(minimo) if minimo != math.inf else None)
+
+        resultados_unicos = []
+        for i, (clave, c_idx) in enumerate(zip(self._unicos, mejor)):
+            if c_idx is None:
+                resultados_unicos.append(None)
+                continue
+            tarifa, ancho = combinaciones[c_idx]
+            metros = self._metros_por_ancho[ancho][i]
+            compra, precio, costo = costo_con_tarifa(metros, tarifa)
+            cantidad = clave[4] * (2 if clave[5] else 1)
+            resultados_unicos.append({
+                "proveedor": tarifa["nombre"],
+                "ancho_tela_cm": ancho,
+                "metros_necesarios": metros,
+                "metros_compra": compra,
+                "precio_por_metro": precio,
+                "costo_total": costo,
+                "costo_unitario": round(costo / cantidad, 2)
+            })
+        return [dict(resultados_unicos[k]) if resultados_unicos[k] is not None else None
+                for k in self._indice]
+
+
+# ------------------------
+# GUARDADO (TXT / XLSX / COLUMNAR)
 # ------------------------
 def guardar_txt(filepath, resumen):
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write("RESULTADO - " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
-        for campo, valor in resumen.items():
-            f.write(f"{campo}: {valor}\n")
+    guardar_txt_lote(filepath, [resumen])
 
 
 def guardar_xlsx(filepath, resumen):
@@ -184,6 +515,436 @@ def guardar_xlsx(filepath, resumen):
     wb.save(filepath)
 
 
+def guardar_txt_lote(filepath, resumenes):
+    """
+    Como guardar_txt, pero con varios resúmenes separados por una línea en blanco.
+    Los valores con saltos de línea (p. ej. notas) siguen en líneas que empiezan
+    con dos espacios, así una línea en blanco dentro del valor no corta el resumen.
+    """
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write("RESULTADO - " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
+        for i, resumen in enumerate(resumenes):
+            if i:
+                f.write("\n")
+            for campo, valor in resumen.items():
+                valor = "\n  ".join(str(valor).split("\n"))
+                f.write(f"{campo}: {valor}\n")
+
+
+def guardar_xlsx_lote(filepath, resumenes, campos=None):
+    """
+    Guarda varios resúmenes como tabla: una fila por resumen y una columna por campo.
+    Los campos ausentes (o None) quedan como celdas vacías; los decimales no finitos
+    (nan, inf) se guardan como texto porque Excel no los admite.
+    'campos' fija las columnas del encabezado; si se pasa, las filas se escriben a
+    medida que se recorren. Si no, se toman de una primera pasada por 'resumenes'
+    (que sólo se copia a una lista si es un iterador de una sola pasada).
+    """
+    if openpyxl is None:
+        raise RuntimeError("openpyxl no está instalado. Instala con: pip install openpyxl")
+    if campos is None:
+        if iter(resumenes) is resumenes:
+            resumenes = list(resumenes)
+        campos = {}
+        for resumen in resumenes:
+            campos.update(dict.fromkeys(resumen))
+    campos = list(campos)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Resultados")
+    ws.append(campos)
+    for resumen in resumenes:
+        fila = []
+        for campo in campos:
+            v = resumen.get(campo)
+            if isinstance(v, float) and not math.isfinite(v):
+                v = str(v)
+            fila.append(v if v is None or isinstance(v, (int, float)) else str(v))
+        ws.append(fila)
+    wb.save(filepath)
+
+
+def interpretar_valor(texto):
+    """
+    Convierte a bool, int o float sólo los textos que tienen exactamente la forma
+    que produce str() para esos tipos ("True", "12", "12.5"); el resto queda como texto.
+    """
+    if not isinstance(texto, str):
+        return texto
+    if texto in ("True", "False"):
+        return texto == "True"
+    try:
+        n = int(texto)
+        if str(n) == texto:
+            return n
+    except ValueError:
+        pass
+    try:
+        x = float(texto)
+        if math.isfinite(x) and repr(x) == texto:
+            return x
+    except ValueError:
+        pass
+    return texto
+
+
+def leer_txt(filepath):
+    """
+    Lee un archivo escrito por guardar_txt o guardar_txt_lote línea a línea.
+    Devuelve un generador de dicts (uno por resumen).
+    """
+    actual = {}
+    ultimo = None
+    with open(filepath, "r", encoding="utf-8") as f:
+        for n, linea in enumerate(f):
+            if linea.endswith("\n"):
+                linea = linea[:-1]
+            if n == 0 and linea.startswith("RESULTADO - "):
+                continue
+            if linea.startswith("  ") and ultimo is not None:
+                # continuación de un valor con saltos de línea (p. ej. notas)
+                actual[ultimo] = f"{actual[ultimo]}\n{linea[2:]}"
+                continue
+            if not linea:
+                if actual:
+                    yield {campo: interpretar_valor(v) for campo, v in actual.items()}
+                    actual, ultimo = {}, None
+                continue
+            if ": " in linea:
+                campo, valor = linea.split(": ", 1)
+                actual[campo] = valor
+                ultimo = campo
+            elif ultimo is not None:
+                # archivos viejos: continuación sin sangría
+                actual[ultimo] = f"{actual[ultimo]}\n{linea}"
+    if actual:
+        yield {campo: interpretar_valor(v) for campo, v in actual.items()}
+
+
+def leer_xlsx(filepath):
+    """
+    Lee un archivo escrito por guardar_xlsx (Campo/Valor) o guardar_xlsx_lote (tabla).
+    Devuelve un generador de dicts (uno por resumen) que recorre la hoja fila a fila.
+    """
+    if openpyxl is None:
+        raise RuntimeError("openpyxl no está instalado. Instala con: pip install openpyxl")
+    wb = openpyxl.load_workbook(filepath, read_only=True)
+    try:
+        filas = wb.active.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        if tuple(encabezado[:2]) == ("Campo", "Valor"):
+            # guardar_xlsx guarda todos los valores como texto
+            yield {str(f[0]): interpretar_valor(f[1]) for f in filas if f[0] is not None}
+            return
+        # la tabla conserva los tipos de cada celda
+        for f in filas:
+            yield {c: v for c, v in zip(encabezado, f) if v is not None}
+    finally:
+        wb.close()
+
+
+# ------------------------
+# FORMATO COLUMNAR (BINARIO)
+# ------------------------
+# Estructura del archivo:
+#   MAGIA | bloque 1 | bloque 2 | ... | pie JSON | largo del pie (8 bytes) | MAGIA
+# Cada bloque guarda sus columnas una tras otra como arrays de tipo fijo
+# (alineadas a 8 bytes), más una máscara de nulos (int8) si la columna tiene
+# None en ese bloque. Los textos se guardan como códigos enteros (-1 = nulo) y
+# el diccionario de textos va en el pie, igual que el tipo y los desplazamientos
+# de cada columna en cada bloque, así las columnas se leen con mmap sin cargar
+# el archivo entero.
+# Cada bloque elige el tipo de sus columnas; el tipo de la columna en el archivo
+# es el más amplio de todos los bloques (booleano -> entero -> decimal -> texto)
+# y al leer los valores se convierten a ese tipo.
+MAGIA_COLUMNAR = b"CTCOL01\n"
+
+# tipo lógico -> código de array / memoryview
+CODIGOS_COLUMNAR = {"booleano": "b", "entero": "q", "decimal": "d", "texto": "i"}
+
+ENTERO_MIN, ENTERO_MAX = -2 ** 63, 2 ** 63 - 1
+
+# tipos numéricos, del más angosto al más amplio
+TIPOS_NUMERICOS = ("booleano", "entero", "decimal")
+
+
+def _inferir_tipo(valores):
+    """
+    Elige el tipo lógico para una lista de valores no nulos.
+    Los bool mezclados con números se guardan como números (True -> 1) y los
+    enteros fuera del rango de int64 hacen la columna texto, sin perder dígitos.
+    """
+    if all(isinstance(v, bool) for v in valores):
+        return "booleano"
+    if not all(isinstance(v, (int, float)) for v in valores):
+        return "texto"
+    if not all(ENTERO_MIN <= v <= ENTERO_MAX for v in valores if isinstance(v, int)):
+        return "texto"
+    if all(isinstance(v, int) for v in valores):
+        return "entero"
+    return "decimal"
+
+
+def _tipo_comun(a, b):
+    """Tipo más amplio que admite valores de los tipos a y b."""
+    if a is None or a == b:
+        return b
+    if a in TIPOS_NUMERICOS and b in TIPOS_NUMERICOS:
+        return max(a, b, key=TIPOS_NUMERICOS.index)
+    return "texto"
+
+
+def _convertir_tipo(valores, tipo_origen, tipo_destino):
+    """Convierte valores leídos de un bloque al tipo de la columna en el archivo."""
+    if tipo_origen == tipo_destino:
+        return valores
+    conv = {"entero": int, "decimal": float}.get(tipo_destino, str)
+    return [None if v is None else conv(v) for v in valores]
+
+
+class EscritorColumnar:
+    """
+    Escribe resultados por lotes en formato columnar binario.
+    Las columnas y sus tipos se infieren en cada bloque: una columna nueva se
+    agrega al archivo y una que falta en un bloque queda nula en esas filas.
+    'tipos' (dict campo -> "booleano" | "entero" | "decimal" | "texto") fija
+    el tipo de algunas columnas; un valor que no encaja da ValueError.
+    Usar como context manager o llamar a cerrar() al terminar.
+    """
+
+    def __init__(self, filepath, tipos=None):
+        self.filepath = filepath
+        self.tipos_fijos = dict(tipos) if tipos else {}
+        # campo -> tipo de la columna en el archivo (el más amplio visto)
+        self.tipos = {}
+        self._f = open(filepath, "wb")
+        self._f.write(MAGIA_COLUMNAR)
+        self._bloques = []
+        self._diccionarios = {}
+        self._codigos_texto = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _escribir_array(self, datos):
+        desplazamiento = self._f.tell()
+        datos.tofile(self._f)
+        relleno = -self._f.tell() % 8
+        if relleno:
+            self._f.write(b"\0" * relleno)
+        return desplazamiento
+
+    def escribir_bloque(self, filas):
+        """Agrega un bloque con las filas (lista de dicts) dadas."""
+        filas = list(filas)
+        if not filas:
+            return
+        campos = []
+        vistos = set()
+        for fila in filas:
+            for campo in fila:
+                if campo not in vistos:
+                    vistos.add(campo)
+                    campos.append(campo)
+        columnas = {}
+        for campo in campos:
+            valores = [fila.get(campo) for fila in filas]
+            presentes = [v for v in valores if v is not None]
+            if not presentes:
+                continue
+            tipo = _inferir_tipo(presentes)
+            fijo = self.tipos_fijos.get(campo)
+            if fijo is not None:
+                if _tipo_comun(tipo, fijo) != fijo:
+                    raise ValueError(f"La columna '{campo}' es de tipo {fijo} y recibió valores de tipo {tipo}.")
+                tipo = fijo
+            hay_nulos = len(presentes) != len(valores)
+            if tipo == "texto":
+                codigos = self._codigos_texto.setdefault(campo, {})
+                dicc = self._diccionarios.setdefault(campo, [])
+                datos = array("i")
+                for v in valores:
+                    if v is None:
+                        datos.append(-1)
+                        continue
+                    v = str(v)
+                    c = codigos.get(v)
+                    if c is None:
+                        c = codigos[v] = len(dicc)
+                        dicc.append(v)
+                    datos.append(c)
+                hay_nulos = False
+            elif tipo == "decimal":
+                datos = array("d", [0.0 if v is None else float(v) for v in valores])
+            else:
+                datos = array(CODIGOS_COLUMNAR[tipo], [0 if v is None else v for v in valores])
+            columnas[campo] = {
+                "tipo": tipo,
+                "datos": self._escribir_array(datos),
+                "nulos": (self._escribir_array(array("b", [v is None for v in valores]))
+                          if hay_nulos else None)
+            }
+            self.tipos[campo] = _tipo_comun(self.tipos.get(campo), tipo)
+        self._bloques.append({"filas": len(filas), "columnas": columnas})
+
+    def cerrar(self):
+        if self._f.closed:
+            return
+        pie = {
+            "version": 1,
+            "orden_bytes": sys.byteorder,
+            "columnas": [{"nombre": c, "tipo": t} for c, t in self.tipos.items()],
+            "bloques": self._bloques,
+            "diccionarios": self._diccionarios
+        }
+        datos = json.dumps(pie, ensure_ascii=False).encode("utf-8")
+        self._f.write(datos)
+        self._f.write(struct.pack("<Q", len(datos)))
+        self._f.write(MAGIA_COLUMNAR)
+        self._f.close()
+
+
+class LectorColumnar:
+    """
+    Lee un archivo columnar con mmap: las columnas se recorren bloque a bloque
+    sin cargar el archivo completo en memoria.
+    Usar como context manager o llamar a cerrar() al terminar.
+    """
+
+    def __init__(self, filepath):
+        self._f = open(filepath, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._f.close()
+            raise ValueError("El archivo columnar está vacío o incompleto.")
+        fin = len(self._mm) - len(MAGIA_COLUMNAR)
+        if (self._mm[:len(MAGIA_COLUMNAR)] != MAGIA_COLUMNAR
+                or self._mm[fin:] != MAGIA_COLUMNAR):
+            self.cerrar()
+            raise ValueError("El archivo no tiene formato columnar válido.")
+        largo_pie = struct.unpack("<Q", self._mm[fin - 8:fin])[0]
+        pie = json.loads(self._mm[fin - 8 - largo_pie:fin - 8].decode("utf-8"))
+        self._intercambiar = pie["orden_bytes"] != sys.byteorder
+        self.tipos = {c["nombre"]: c["tipo"] for c in pie["columnas"]}
+        self._bloques = pie["bloques"]
+        self._diccionarios = pie["diccionarios"]
+        self.num_filas = sum(b["filas"] for b in self._bloques)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def __len__(self):
+        return self.num_filas
+
+    @property
+    def columnas(self):
+        return list(self.tipos)
+
+    def _vista(self, desplazamiento, filas, codigo):
+        tam = array(codigo).itemsize
+        vista = memoryview(self._mm)[desplazamiento:desplazamiento + filas * tam].cast(codigo)
+        if not self._intercambiar or tam == 1:
+            return vista
+        datos = array(codigo, vista)
+        vista.release()
+        datos.byteswap()
+        return datos
+
+    def bloques(self, columna):
+        """
+        Devuelve, por cada bloque, (tipo, datos, nulos): el tipo de la columna en
+        ese bloque, sus datos crudos (memoryview sin copia, o array si el archivo
+        tiene otro orden de bytes) y la máscara de nulos (1 = nulo) o None si no
+        hay nulos. Si la columna no aparece en el bloque, datos es None (todo nulo).
+        Los textos vienen como códigos: ver diccionario(). Liberar las memoryviews
+        antes de cerrar().
+        """
+        for bloque in self._bloques:
+            col = bloque["columnas"].get(columna)
+            if col is None:
+                yield None, None, None
+                continue
+            datos = self._vista(col["datos"], bloque["filas"], CODIGOS_COLUMNAR[col["tipo"]])
+            nulos = (self._vista(col["nulos"], bloque["filas"], "b")
+                     if col["nulos"] is not None else None)
+            yield col["tipo"], datos, nulos
+
+    def diccionario(self, columna):
+        """Lista de textos de una columna de tipo texto (índice = código)."""
+        return self._diccionarios.get(columna, [])
+
+    def iterar_columna(self, columna):
+        """Recorre los valores de una columna ya decodificados (None = nulo)."""
+        tipo_columna = self.tipos[columna]
+        dicc = self.diccionario(columna)
+        for bloque, (tipo, datos, nulos) in zip(self._bloques, self.bloques(columna)):
+            if datos is None:
+                yield from [None] * bloque["filas"]
+                continue
+            if tipo == "texto":
+                valores = [dicc[c] if c >= 0 else None for c in datos]
+            elif tipo == "booleano":
+                valores = [bool(v) for v in datos]
+            else:
+                valores = datos.tolist()
+            if nulos is not None:
+                valores = [None if nulo else v for v, nulo in zip(valores, nulos)]
+            for vista in (datos, nulos):
+                if isinstance(vista, memoryview):
+                    vista.release()
+            yield from _convertir_tipo(valores, tipo, tipo_columna)
+
+    def filas(self):
+        """Recorre las filas como dicts (campo -> valor); los nulos no se incluyen."""
+        iteradores = [self.iterar_columna(c) for c in self.tipos]
+        for valores in zip(*iteradores):
+            yield {c: v for c, v in zip(self.tipos, valores) if v is not None}
+
+    def cerrar(self):
+        if not self._mm.closed:
+            self._mm.close()
+        self._f.close()
+
+
+def guardar_columnar(filepath, resumenes, filas_por_bloque=65536, tipos=None):
+    """Guarda un iterable de resúmenes (dicts) en formato columnar, por bloques."""
+    with EscritorColumnar(filepath, tipos=tipos) as escritor:
+        bloque = []
+        for resumen in resumenes:
+            bloque.append(resumen)
+            if len(bloque) >= filas_por_bloque:
+                escritor.escribir_bloque(bloque)
+                bloque = []
+        escritor.escribir_bloque(bloque)
+
+
+def columnar_a_txt(ruta_columnar, ruta_txt):
+    with LectorColumnar(ruta_columnar) as lector:
+        guardar_txt_lote(ruta_txt, lector.filas())
+
+
+def columnar_a_xlsx(ruta_columnar, ruta_xlsx):
+    with LectorColumnar(ruta_columnar) as lector:
+        # las columnas ya están en el pie: las filas se escriben sin cargarlas
+        guardar_xlsx_lote(ruta_xlsx, lector.filas(), campos=lector.columnas)
+
+
+def txt_a_columnar(ruta_txt, ruta_columnar, filas_por_bloque=65536):
+    guardar_columnar(ruta_columnar, leer_txt(ruta_txt), filas_por_bloque=filas_por_bloque)
+
+
+def xlsx_a_columnar(ruta_xlsx, ruta_columnar, filas_por_bloque=65536):
+    guardar_columnar(ruta_columnar, leer_xlsx(ruta_xlsx), filas_por_bloque=filas_por_bloque)
+
+
 # ------------------------
 # APLICACIÓN / UI
 # ------------------------
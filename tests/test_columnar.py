@@ -0,0 +1,169 @@
+import math
+
+import pytest
+
+import calculadora_tela_v2 as calc
+
+
+def _resultados(n):
+    res = []
+    for i in range(n):
+        r, err = calc.calcular_tela_por_cantidad(150 + (i % 3) * 0.5, 37.5, 20 + i % 7, 1, 5, 10 + i,
+                                                 doble_molde=bool(i % 2))
+        assert err is None
+        res.append(r)
+    return res
+
+
+def _leer(ruta):
+    with calc.LectorColumnar(ruta) as lector:
+        return list(lector.filas())
+
+
+def test_columnar_ida_y_vuelta_varios_bloques(tmp_path):
+    ruta = tmp_path / "r.col"
+    res = _resultados(25)
+    calc.guardar_columnar(ruta, res, filas_por_bloque=4)
+    with calc.LectorColumnar(ruta) as lector:
+        assert len(lector) == 25
+        assert lector.tipos["ancho_tela_cm"] == "decimal"
+        assert lector.tipos["moldes_por_fila"] == "entero"
+        assert lector.tipos["doble_molde"] == "booleano"
+        assert lector.tipos["modo"] == "texto"
+        total = 0
+        for tipo, datos, nulos in lector.bloques("cantidad_solicitada"):
+            assert tipo == "entero" and nulos is None
+            total += sum(datos)
+            datos.release()
+        assert total == sum(r["cantidad_solicitada"] for r in res)
+        assert list(lector.filas()) == res
+
+
+def test_columnar_tipos_que_cambian_entre_bloques(tmp_path):
+    ruta = tmp_path / "r.col"
+    filas = [{"a": 150, "b": 1}, {"a": 160, "b": 2},
+             {"a": 150.5, "b": "N/A"}, {"a": 151, "b": 3}]
+    calc.guardar_columnar(ruta, filas, filas_por_bloque=2)
+    with calc.LectorColumnar(ruta) as lector:
+        assert lector.tipos == {"a": "decimal", "b": "texto"}
+        assert list(lector.filas()) == [{"a": 150.0, "b": "1"}, {"a": 160.0, "b": "2"},
+                                        {"a": 150.5, "b": "N/A"}, {"a": 151.0, "b": "3"}]
+
+
+def test_columnar_campos_ausentes_nuevos_y_nulos(tmp_path):
+    ruta = tmp_path / "r.col"
+    filas = [{"n": 1, "ok": True}, {"n": None, "ok": False},
+             {"ok": True}, {"n": 4, "nuevo": "x", "d": None},
+             {"d": 2.5, "nuevo": None}]
+    calc.guardar_columnar(ruta, filas, filas_por_bloque=2)
+    assert _leer(ruta) == [{"n": 1, "ok": True}, {"ok": False}, {"ok": True},
+                           {"n": 4, "nuevo": "x"}, {"d": 2.5}]
+
+
+def test_columnar_nan_no_es_nulo(tmp_path):
+    ruta = tmp_path / "r.col"
+    calc.guardar_columnar(ruta, [{"x": float("nan")}, {"x": None}, {"x": 1.5}])
+    filas = _leer(ruta)
+    assert math.isnan(filas[0]["x"])
+    assert filas[1:] == [{}, {"x": 1.5}]
+
+
+def test_columnar_tipo_fijo_rechaza_valores_incompatibles(tmp_path):
+    with pytest.raises(ValueError):
+        calc.guardar_columnar(tmp_path / "r.col", [{"a": "texto"}], tipos={"a": "entero"})
+
+
+def test_columnar_enteros_fuera_de_int64_van_como_texto(tmp_path):
+    ruta = tmp_path / "r.col"
+    filas = [{"n": 2 ** 70}, {"n": 5}, {"n": 7}, {"n": -2 ** 63}, {"n": 1.5, "m": -2 ** 64}]
+    calc.guardar_columnar(ruta, filas, filas_por_bloque=2)
+    with calc.LectorColumnar(ruta) as lector:
+        assert lector.tipos == {"n": "texto", "m": "texto"}
+        assert list(lector.filas()) == [{"n": str(2 ** 70)}, {"n": "5"}, {"n": "7"},
+                                        {"n": str(-2 ** 63)}, {"n": "1.5", "m": str(-2 ** 64)}]
+
+
+def test_columnar_bool_mezclado_con_numeros(tmp_path):
+    ruta = tmp_path / "r.col"
+    filas = [{"a": True, "b": True}, {"a": False, "b": 3}, {"a": 2, "b": 1.5}, {"a": 7, "b": False}]
+    calc.guardar_columnar(ruta, filas, filas_por_bloque=2)
+    with calc.LectorColumnar(ruta) as lector:
+        assert lector.tipos == {"a": "entero", "b": "decimal"}
+        leidos = list(lector.filas())
+    assert leidos == [{"a": 1, "b": 1.0}, {"a": 0, "b": 3.0}, {"a": 2, "b": 1.5}, {"a": 7, "b": 0.0}]
+    assert all(type(f["a"]) is int for f in leidos)
+
+
+def test_columnar_archivo_invalido(tmp_path):
+    ruta = tmp_path / "r.col"
+    ruta.write_bytes(b"no es columnar")
+    with pytest.raises(ValueError):
+        calc.LectorColumnar(ruta)
+
+
+def test_txt_ida_y_vuelta_con_notas(tmp_path):
+    resumen = {"Modo de cálculo": "Calcular tela", "Moldes por fila": 4, "Largo": 63.0,
+               "Proveedor": "123", "nota": "nan",
+               "Notas": "Cliente: Ana\n\nEntregar lunes"}
+    ruta = tmp_path / "r.txt"
+    calc.guardar_txt(ruta, resumen)
+    leido = list(calc.leer_txt(ruta))
+    assert leido[0]["Notas"] == "Cliente: Ana\n\nEntregar lunes"
+    assert leido[0]["Moldes por fila"] == 4 and leido[0]["Largo"] == 63.0
+    assert leido[0]["nota"] == "nan"
+
+    ruta_col = tmp_path / "r.col"
+    ruta_txt = tmp_path / "r2.txt"
+    calc.txt_a_columnar(ruta, ruta_col)
+    calc.columnar_a_txt(ruta_col, ruta_txt)
+    # todo salvo la línea con fecha y hora queda igual
+    assert ruta_txt.read_text(encoding="utf-8").split("\n")[1:] == \
+        ruta.read_text(encoding="utf-8").split("\n")[1:]
+
+
+def test_txt_lote_varios_resumenes(tmp_path):
+    ruta = tmp_path / "r.txt"
+    res = _resultados(5)
+    calc.guardar_txt_lote(ruta, res)
+    leidos = calc.leer_txt(ruta)
+    assert next(leidos) == res[0]
+    assert list(leidos) == res[1:]
+
+
+def test_interpretar_valor_solo_formatos_del_escritor():
+    assert calc.interpretar_valor("12") == 12
+    assert calc.interpretar_valor("12.5") == 12.5
+    assert calc.interpretar_valor("True") is True
+    for texto in ("nan", "inf", "007", " 12", "1_000", "12.50", "abc"):
+        assert calc.interpretar_valor(texto) == texto
+
+
+def test_xlsx_ida_y_vuelta(tmp_path):
+    pytest.importorskip("openpyxl")
+    res = _resultados(7)
+    res[2]["Notas"] = "Cliente: Ana\n\nEntregar lunes"
+    ruta_col = tmp_path / "r.col"
+    ruta_xlsx = tmp_path / "r.xlsx"
+    ruta_col2 = tmp_path / "r2.col"
+    calc.guardar_columnar(ruta_col, res, filas_por_bloque=3)
+    calc.columnar_a_xlsx(ruta_col, ruta_xlsx)
+    assert list(calc.leer_xlsx(ruta_xlsx)) == res
+    calc.xlsx_a_columnar(ruta_xlsx, ruta_col2)
+    assert _leer(ruta_col2) == res
+
+
+def test_xlsx_campo_valor(tmp_path):
+    pytest.importorskip("openpyxl")
+    ruta = tmp_path / "r.xlsx"
+    calc.guardar_xlsx(ruta, {"Moldes por fila": 4, "Modo": "Calcular tela"})
+    assert list(calc.leer_xlsx(ruta)) == [{"Moldes por fila": 4, "Modo": "Calcular tela"}]
+
+
+def test_xlsx_lote_desde_iterador(tmp_path):
+    pytest.importorskip("openpyxl")
+    res = [{"a": 1}, {"a": 2, "b": "x"}, {"c": 2.5}]
+    ruta = tmp_path / "r.xlsx"
+    calc.guardar_xlsx_lote(ruta, iter(res))
+    assert list(calc.leer_xlsx(ruta)) == res
+    calc.guardar_xlsx_lote(ruta, (r for r in res), campos=["c", "b", "a"])
+    assert list(calc.leer_xlsx(ruta)) == res
@@ -0,0 +1,150 @@
+import random
+
+import pytest
+
+import calculadora_tela_v2 as calc
+
+
+def _pedido(ancho_molde=30, alto_molde=40, cantidad=10, **extra):
+    pedido = {"ancho_molde_cm": ancho_molde, "alto_molde_cm": alto_molde, "cantidad": cantidad}
+    pedido.update(extra)
+    return pedido
+
+
+def _tarifa(tramos, anchos=(150,), minimo=0):
+    tarifa, err = calc.preparar_tarifa({"nombre": "P", "anchos_cm": list(anchos),
+                                        "tramos": tramos, "minimo_metros": minimo})
+    assert err is None
+    return tarifa
+
+
+def test_un_tramo_modo_float():
+    # tela 150: 5 moldes de 30 por fila, 10 piezas = 2 filas de 40 cm = 0,8 m a 10 $/m
+    motor = calc.MotorCostos([_pedido()])
+    res = motor.cotizar([{"nombre": "A", "anchos_cm": [150], "tramos": [(0, 10)]}])
+    assert res == [{"proveedor": "A", "ancho_tela_cm": 150.0, "metros_necesarios": 0.8,
+                    "metros_compra": 0.8, "precio_por_metro": 10.0, "costo_total": 8.0,
+                    "costo_unitario": 0.8}]
+
+
+def test_margen_y_desperdicio():
+    # 29x39 + 0,5 de margen por lado = 30x40; 0,8 m + 10 % = 0,88 m
+    motor = calc.MotorCostos([_pedido(29, 39, margen_costura_cm=0.5, desperdicio_pct=10)])
+    res = motor.cotizar([{"nombre": "A", "anchos_cm": [150], "tramos": [(0, 10)]}])[0]
+    assert res["metros_necesarios"] == 0.88
+    assert res["costo_total"] == 8.8
+
+
+def test_varios_tramos():
+    tarifa = _tarifa([(20, 6), (0, 10), (5, 8)])
+    assert tarifa["limites_m"] == [0, 5, 20]
+    assert calc.costo_con_tarifa(2, tarifa) == (2, 10, 20)
+    assert calc.costo_con_tarifa(6, tarifa) == (6, 8, 48)
+    assert calc.costo_con_tarifa(25, tarifa) == (25, 6, 150)
+
+
+def test_salto_a_tramo_superior():
+    tarifa = _tarifa([(0, 10), (5, 8), (20, 6)])
+    # 4,5 m a 10 = 45, pero 5 m a 8 = 40
+    assert calc.costo_con_tarifa(4.5, tarifa) == (5, 8, 40)
+    # 18 m a 8 = 144, pero 20 m a 6 = 120
+    assert calc.costo_con_tarifa(18, tarifa) == (20, 6, 120)
+    # 3 m a 10 = 30, más barato que 5 m a 8
+    assert calc.costo_con_tarifa(3, tarifa) == (3, 10, 30)
+
+
+def test_minimo_metros():
+    tarifa = _tarifa([(0, 10)], minimo=3)
+    assert calc.costo_con_tarifa(0.8, tarifa) == (3, 10, 30)
+    assert calc.costo_con_tarifa(3.5, tarifa) == (3.5, 10, 35)
+    motor = calc.MotorCostos([_pedido()])
+    res = motor.cotizar([{"nombre": "A", "anchos_cm": [150], "tramos": [(0, 10)], "minimo_metros": 3}])
+    assert (res[0]["metros_necesarios"], res[0]["metros_compra"], res[0]["costo_total"]) == (0.8, 3, 30)
+
+
+def test_elige_el_mas_barato_entre_proveedores_y_anchos():
+    # A-100: 3 por fila, 4 filas = 1,6 m -> 16; A-150: 0,8 m -> 8; B-120: 4 por fila, 3 filas = 1,2 m -> 10,8
+    proveedores = [{"nombre": "A", "anchos_cm": [100, 150], "tramos": [(0, 10)]},
+                   {"nombre": "B", "anchos_cm": [120], "tramos": [(0, 9)]}]
+    res = calc.MotorCostos([_pedido()]).cotizar(proveedores)[0]
+    assert (res["proveedor"], res["ancho_tela_cm"], res["costo_total"]) == ("A", 150.0, 8.0)
+    # con A más caro gana B
+    proveedores[0]["tramos"] = [(0, 20)]
+    res = calc.MotorCostos([_pedido()]).cotizar(proveedores)[0]
+    assert (res["proveedor"], res["ancho_tela_cm"], res["costo_total"]) == ("B", 120.0, 10.8)
+
+
+def test_pedido_que_no_entra_devuelve_none():
+    motor = calc.MotorCostos([_pedido(200, 40), _pedido()])
+    res = motor.cotizar([{"nombre": "A", "anchos_cm": [150], "tramos": [(0, 10)]}])
+    assert res[0] is None
+    assert res[1]["costo_total"] == 8.0
+    assert calc.MotorCostos([_pedido()]).cotizar([{"nombre": "A", "tramos": [(0, 10)]}]) == [None]
+
+
+def test_pedidos_identicos_reciben_dicts_distintos():
+    motor = calc.MotorCostos([_pedido(), _pedido()])
+    res = motor.cotizar([{"nombre": "A", "anchos_cm": [150], "tramos": [(0, 10)]}])
+    assert res[0] == res[1] and res[0] is not res[1]
+    res[0]["costo_total"] = 0
+    assert res[1]["costo_total"] == 8.0
+
+
+def test_costos_por_lote_coinciden_con_escalar():
+    rng = random.Random(7)
+    tarifa = _tarifa([(0, 12.5), (3, 11), (10, 9.75), (50, 7.2)], minimo=1.5)
+    metros = [rng.randint(0, 8000) / 100 for _ in range(2000)] + [None]
+    lote = calc.costos_con_tarifa(metros, tarifa)
+    for m, costo in zip(metros[:-1], lote):
+        assert round(costo, 2) == calc.costo_con_tarifa(m, tarifa)[2]
+    assert lote[-1] == float("inf")
+
+
+def test_segunda_cotizacion_no_recalcula_disposiciones(monkeypatch):
+    motor = calc.MotorCostos([_pedido(), _pedido(25, 35, 7)])
+    primera = motor.cotizar([{"nombre": "A", "anchos_cm": [150, 120], "tramos": [(0, 10)]}])
+
+    llamadas = []
+    original = calc.calcular_tela_por_cantidad
+
+    def contar(*args, **kwargs):
+        llamadas.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(calc, "calcular_tela_por_cantidad", contar)
+    segunda = motor.cotizar([{"nombre": "A", "anchos_cm": [150, 120], "tramos": [(0, 5)]}])
+    assert llamadas == []
+    assert [r["costo_total"] for r in segunda] == [round(r["costo_total"] / 2, 2) for r in primera]
+    motor.invalidar(150)
+    motor.cotizar([{"nombre": "A", "anchos_cm": [150, 120], "tramos": [(0, 5)]}])
+    assert len(llamadas) == 2
+
+
+def test_cantidad_no_positiva_se_rechaza():
+    with pytest.raises(ValueError):
+        calc.MotorCostos([_pedido(), _pedido(cantidad=0)])
+    with pytest.raises(ValueError):
+        calc.MotorCostos([_pedido(cantidad=-3)])
+
+
+@pytest.mark.parametrize("proveedor", [
+    {"tramos": [(0, "diez")], "anchos_cm": [150]},
+    {"tramos": [("cero", 10)], "anchos_cm": [150]},
+    {"tramos": [(0, None)], "anchos_cm": [150]},
+    {"tramos": [(0, 10)], "anchos_cm": ["ancho"]},
+    {"tramos": [(0, 10)], "anchos_cm": [150], "minimo_metros": "x"},
+    {"tramos": [(0, 0)], "anchos_cm": [150]},
+    {"tramos": [(0, 10), (5, -1)], "anchos_cm": [150]},
+    {"tramos": [(0, 10)], "anchos_cm": [0]},
+    {"tramos": [(0, 10)], "anchos_cm": [150, -20]},
+    {"tramos": [(0, 10)], "anchos_cm": [150], "minimo_metros": -1},
+    {"tramos": [(0, 10), (0, 8)], "anchos_cm": [150]},
+    {"tramos": [(1, 10)], "anchos_cm": [150]},
+    {"tramos": [], "anchos_cm": [150]},
+])
+def test_tarifa_invalida(proveedor):
+    tarifa, err = calc.preparar_tarifa(dict(proveedor, nombre="X"))
+    assert tarifa is None
+    assert isinstance(err, str) and "X" in err
+    with pytest.raises(ValueError):
+        calc.MotorCostos([_pedido()]).cotizar([dict(proveedor, nombre="X")])